@@ -5,11 +5,12 @@ A super simple FastAPI application that allows students to view and sign up
 for extracurricular activities at Mergington High School.
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import RedirectResponse
 import os
 from pathlib import Path
+from uuid import uuid4
 
 app = FastAPI(title="Mergington High School API",
               description="API for viewing and signing up for extracurricular activities")
@@ -78,21 +79,40 @@ activities = {
 }
 
 
+# Set mirror of each activity's participants for O(1) membership checks;
+# the lists above stay the source of ordering for the JSON output
+participants_set = {name: set(activity["participants"]) for name, activity in activities.items()}
+
+# Bumped on every signup/unregister; used as the ETag for GET /activities
+activities_version = 0
+
+# Distinguishes ETags across restarts, since activities_version starts over at 0
+boot_id = uuid4().hex
+
+
 @app.get("/")
 def root():
     return RedirectResponse(url="/static/index.html")
 
 
 @app.get("/activities")
-def get_activities():
+def get_activities(request: Request, response: Response):
+    etag = f'W/"{boot_id}-{activities_version}"'
+    # Let clients revalidate without re-serializing unchanged activities
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
     return activities
 
 
 @app.post("/activities/{activity_name}/signup")
 def signup_for_activity(activity_name: str, email: str):
     """Sign up a student for an activity"""
+    global activities_version
+
     # Validate student is not already signed up
-    if activity_name in activities and email in activities[activity_name]["participants"]:
+    if activity_name in activities and email in participants_set[activity_name]:
         raise HTTPException(status_code=400, detail="Student is already signed up for this activity")
 
     # Validate activity exists
@@ -104,12 +124,16 @@ def signup_for_activity(activity_name: str, email: str):
 
     # Add student
     activity["participants"].append(email)
+    participants_set[activity_name].add(email)
+    activities_version += 1
     return {"message": f"Signed up {email} for {activity_name}"}
 
 
 @app.post("/activities/{activity_name}/unregister")
 def unregister_from_activity(activity_name: str, email: str):
     """Unregister a student from an activity"""
+    global activities_version
+
     # Validate activity exists
     if activity_name not in activities:
         raise HTTPException(status_code=404, detail="Activity not found")
@@ -118,9 +142,11 @@ def unregister_from_activity(activity_name: str, email: str):
     activity = activities[activity_name]
 
     # Check if student is registered
-    if email not in activity["participants"]:
+    if email not in participants_set[activity_name]:
         raise HTTPException(status_code=400, detail="Student is not registered for this activity")
 
     # Remove student
     activity["participants"].remove(email)
+    participants_set[activity_name].discard(email)
+    activities_version += 1
     return {"message": f"Unregistered {email} from {activity_name}"}
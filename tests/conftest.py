@@ -0,0 +1,22 @@
+"""
+Shared pytest configuration for the Mergington High School Activities API tests
+"""
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from src.app import app
+
+
+def pytest_collection_modifyitems(config, items):
+    """Keep tests marked serial on a single xdist worker under --dist=loadgroup"""
+    for item in items:
+        if item.get_closest_marker("serial"):
+            item.add_marker(pytest.mark.xdist_group("serial"))
+
+
+@pytest.fixture(scope="session")
+async def client():
+    """Create a single async client that calls the FastAPI app in-process"""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
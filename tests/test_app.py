@@ -2,48 +2,86 @@
 Tests for the Mergington High School Activities API
 """
 
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-from src.app import app, activities
+from fastapi.routing import APIRoute
+import src.app
+from src.app import app, activities, participants_set
 
 
-@pytest.fixture
-def client():
-    """Create a test client for the FastAPI app"""
-    return TestClient(app)
-
-
-@pytest.fixture
-def reset_activities():
-    """Reset activities to initial state before each test"""
-    # Store original activities
-    original_activities = {
-        key: {"participants": list(value["participants"])} 
+@pytest.fixture(scope="module")
+def initial_participants():
+    """Snapshot the participant lists once, before any test in the module runs"""
+    return {
+        key: value["participants"].copy()
         for key, value in activities.items()
     }
+
+
+@pytest.fixture(autouse=True)
+def reset_activities(request, initial_participants):
+    """Reset activities to initial state after each test"""
     yield
-    # Restore activities after test
-    for key, value in activities.items():
-        value["participants"] = original_activities[key]["participants"]
+    # Tests marked readonly never mutate activities, so there is nothing to restore
+    if "readonly" in request.keywords:
+        return
+    # Restore in place so the original list objects are kept
+    for key, saved in initial_participants.items():
+        participants = activities[key]["participants"]
+        participants.clear()
+        participants.extend(saved)
+        emails = participants_set[key]
+        emails.clear()
+        emails.update(saved)
+    # The data changed behind the endpoints, so invalidate any cached ETag
+    src.app.activities_version += 1
+
+
+def json_body(response):
+    """Decode a response body with orjson instead of the stdlib json module"""
+    return orjson.loads(response.content)
+
+
+def pick_email(activity, behavior):
+    """Return an email that is or is not registered for the activity"""
+    if behavior == "registered":
+        return activities[activity]["participants"][0]
+    return "test@mergington.edu"
+
+
+async def get_activities(client, cached=None):
+    """Fetch activities, revalidating a previously returned (etag, data) pair"""
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = await client.get("/activities", headers=headers)
+    if response.status_code == 304:
+        return cached
+    assert response.status_code == 200
+    return response.headers["etag"], json_body(response)
+
+
+# Activities the signup/unregister behavior matrix runs against
+MATRIX_ACTIVITIES = ["Chess Club", "Programming Class", "Drama Club"]
 
 
 class TestGetActivities:
     """Tests for GET /activities endpoint"""
 
-    def test_get_activities_success(self, client):
+    @pytest.mark.readonly
+    async def test_get_activities_success(self, client):
         """Test retrieving all activities"""
-        response = client.get("/activities")
+        response = await client.get("/activities")
         assert response.status_code == 200
         
-        data = response.json()
+        data = json_body(response)
         assert isinstance(data, dict)
         assert "Chess Club" in data
         assert "Programming Class" in data
         
-    def test_activities_have_required_fields(self, client):
+    @pytest.mark.readonly
+    async def test_activities_have_required_fields(self, client):
         """Test that activities have all required fields"""
-        response = client.get("/activities")
-        data = response.json()
+        response = await client.get("/activities")
+        data = json_body(response)
         
         for activity_name, activity in data.items():
             assert "description" in activity
@@ -52,154 +90,196 @@ class TestGetActivities:
             assert "participants" in activity
             assert isinstance(activity["participants"], list)
 
+    @pytest.mark.readonly
+    async def test_activities_not_modified(self, client):
+        """Test that a matching If-None-Match returns 304 with no body"""
+        etag, _ = await get_activities(client)
+        response = await client.get("/activities", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+    @pytest.mark.xdist_group("activities-state")
+    async def test_signup_changes_etag(self, client):
+        """Test that a signup invalidates the cached activities"""
+        cached = await get_activities(client)
+        await client.post(
+            "/activities/Chess Club/signup", params={"email": "etag@mergington.edu"}
+        )
+        etag, data = await get_activities(client, cached)
+        assert etag != cached[0]
+        assert "etag@mergington.edu" in data["Chess Club"]["participants"]
+
 
 class TestSignup:
     """Tests for POST /activities/{activity_name}/signup endpoint"""
 
-    def test_signup_success(self, client, reset_activities):
-        """Test successfully signing up for an activity"""
-        response = client.post(
-            "/activities/Chess%20Club/signup?email=test@mergington.edu"
+    pytestmark = pytest.mark.xdist_group("activities-state")
+
+    @pytest.mark.parametrize("activity", MATRIX_ACTIVITIES)
+    @pytest.mark.parametrize(
+        "behavior,expected_status,expected_message",
+        [
+            pytest.param("new", 200, "Signed up {email} for {activity}", id="new"),
+            pytest.param("registered", 400, "already signed up", id="registered"),
+        ],
+    )
+    async def test_signup_behavior(
+        self, client, activity, behavior, expected_status, expected_message
+    ):
+        """Test signing up a new student and an already registered participant"""
+        email = pick_email(activity, behavior)
+        response = await client.post(
+            f"/activities/{activity}/signup", params={"email": email}
         )
-        assert response.status_code == 200
-        data = response.json()
-        assert "Signed up" in data["message"]
-        assert "test@mergington.edu" in data["message"]
-        assert "Chess Club" in data["message"]
+        assert response.status_code == expected_status
+        key = "message" if expected_status == 200 else "detail"
+        assert expected_message.format(email=email, activity=activity) in json_body(response)[key]
         
-    def test_signup_adds_participant(self, client, reset_activities):
+    async def test_signup_adds_participant(self, client):
         """Test that signup adds the participant to the activity"""
         # Get initial participant count
-        response = client.get("/activities")
-        initial_count = len(response.json()["Chess Club"]["participants"])
+        initial_count = len(activities["Chess Club"]["participants"])
         
         # Sign up new participant
-        client.post("/activities/Chess%20Club/signup?email=newstudent@mergington.edu")
+        await client.post(
+            "/activities/Chess Club/signup", params={"email": "newstudent@mergington.edu"}
+        )
         
         # Verify participant was added
-        response = client.get("/activities")
-        new_count = len(response.json()["Chess Club"]["participants"])
-        assert new_count == initial_count + 1
-        assert "newstudent@mergington.edu" in response.json()["Chess Club"]["participants"]
+        response = await client.get("/activities")
+        participants = json_body(response)["Chess Club"]["participants"]
+        assert len(participants) == initial_count + 1
+        assert "newstudent@mergington.edu" in participants
 
-    def test_signup_duplicate_fails(self, client, reset_activities):
+    async def test_signup_duplicate_fails(self, client):
         """Test that signing up twice fails"""
         email = "duplicate@mergington.edu"
         
         # First signup should succeed
-        response1 = client.post(
-            f"/activities/Chess%20Club/signup?email={email}"
+        response1 = await client.post(
+            "/activities/Chess Club/signup", params={"email": email}
         )
         assert response1.status_code == 200
         
         # Second signup should fail
-        response2 = client.post(
-            f"/activities/Chess%20Club/signup?email={email}"
+        response2 = await client.post(
+            "/activities/Chess Club/signup", params={"email": email}
         )
         assert response2.status_code == 400
-        assert "already signed up" in response2.json()["detail"]
+        assert "already signed up" in json_body(response2)["detail"]
 
-    def test_signup_nonexistent_activity_fails(self, client):
+    @pytest.mark.readonly
+    async def test_signup_nonexistent_activity_fails(self, client):
         """Test that signing up for a non-existent activity fails"""
-        response = client.post(
-            "/activities/Nonexistent%20Club/signup?email=test@mergington.edu"
+        response = await client.post(
+            "/activities/Nonexistent Club/signup", params={"email": "test@mergington.edu"}
         )
         assert response.status_code == 404
-        assert "not found" in response.json()["detail"]
-
-    def test_signup_existing_participant(self, client, reset_activities):
-        """Test signing up an already registered participant"""
-        email = "michael@mergington.edu"  # Already in Chess Club
-        response = client.post(
-            f"/activities/Chess%20Club/signup?email={email}"
-        )
-        assert response.status_code == 400
+        assert "not found" in json_body(response)["detail"]
 
 
 class TestUnregister:
     """Tests for POST /activities/{activity_name}/unregister endpoint"""
 
-    def test_unregister_success(self, client, reset_activities):
-        """Test successfully unregistering from an activity"""
-        email = "michael@mergington.edu"  # Already in Chess Club
-        response = client.post(
-            f"/activities/Chess%20Club/unregister?email={email}"
+    pytestmark = pytest.mark.xdist_group("activities-state")
+
+    @pytest.mark.parametrize("activity", MATRIX_ACTIVITIES)
+    @pytest.mark.parametrize(
+        "behavior,expected_status,expected_message",
+        [
+            pytest.param(
+                "registered", 200, "Unregistered {email} from {activity}", id="registered"
+            ),
+            pytest.param("not_registered", 400, "not registered", id="not-registered"),
+        ],
+    )
+    async def test_unregister_behavior(
+        self, client, activity, behavior, expected_status, expected_message
+    ):
+        """Test unregistering a registered participant and a non-participant"""
+        email = pick_email(activity, behavior)
+        response = await client.post(
+            f"/activities/{activity}/unregister", params={"email": email}
         )
-        assert response.status_code == 200
-        data = response.json()
-        assert "Unregistered" in data["message"]
-        assert email in data["message"]
+        assert response.status_code == expected_status
+        key = "message" if expected_status == 200 else "detail"
+        assert expected_message.format(email=email, activity=activity) in json_body(response)[key]
 
-    def test_unregister_removes_participant(self, client, reset_activities):
+    async def test_unregister_removes_participant(self, client):
         """Test that unregister removes the participant"""
         email = "michael@mergington.edu"
         
         # Verify participant is in the activity
-        response = client.get("/activities")
-        assert email in response.json()["Chess Club"]["participants"]
+        assert email in activities["Chess Club"]["participants"]
         
         # Unregister
-        client.post(f"/activities/Chess%20Club/unregister?email={email}")
+        await client.post("/activities/Chess Club/unregister", params={"email": email})
         
         # Verify participant was removed
-        response = client.get("/activities")
-        assert email not in response.json()["Chess Club"]["participants"]
+        response = await client.get("/activities")
+        assert email not in json_body(response)["Chess Club"]["participants"]
 
-    def test_unregister_nonexistent_activity_fails(self, client):
+    @pytest.mark.readonly
+    async def test_unregister_nonexistent_activity_fails(self, client):
         """Test that unregistering from a non-existent activity fails"""
-        response = client.post(
-            "/activities/Nonexistent%20Club/unregister?email=test@mergington.edu"
+        response = await client.post(
+            "/activities/Nonexistent Club/unregister", params={"email": "test@mergington.edu"}
         )
         assert response.status_code == 404
 
-    def test_unregister_non_participant_fails(self, client, reset_activities):
-        """Test that unregistering a non-participant fails"""
-        response = client.post(
-            "/activities/Chess%20Club/unregister?email=notregistered@mergington.edu"
-        )
-        assert response.status_code == 400
-        assert "not registered" in response.json()["detail"]
-
 
 class TestRootRedirect:
     """Tests for root endpoint"""
 
-    def test_root_redirects_to_static(self, client):
+    @pytest.mark.readonly
+    def test_root_redirects_to_static(self):
         """Test that root endpoint redirects to static index.html"""
-        response = client.get("/", follow_redirects=False)
+        route = next(
+            route for route in app.routes
+            if isinstance(route, APIRoute) and route.path == "/"
+        )
+        response = route.endpoint()
         assert response.status_code == 307
-        assert "/static/index.html" in response.headers["location"]
+        assert response.headers["location"] == "/static/index.html"
 
 
 class TestMultipleSignupsAndUnregisters:
     """Integration tests for multiple operations"""
 
-    def test_signup_and_unregister_sequence(self, client, reset_activities):
+    pytestmark = pytest.mark.xdist_group("activities-state")
+
+    async def test_signup_and_unregister_sequence(self, client):
         """Test signing up and then unregistering"""
         email = "sequence@mergington.edu"
-        activity = "Programming%20Class"
+        activity = "Programming Class"
+        
+        participants = activities[activity]["participants"]
         
         # Get initial count
-        response = client.get("/activities")
-        initial_count = len(response.json()["Programming Class"]["participants"])
+        initial_count = len(participants)
         
         # Sign up
-        response = client.post(f"/activities/{activity}/signup?email={email}")
+        response = await client.post(
+            f"/activities/{activity}/signup", params={"email": email}
+        )
         assert response.status_code == 200
         
         # Verify added
-        response = client.get("/activities")
-        assert len(response.json()["Programming Class"]["participants"]) == initial_count + 1
+        assert len(participants) == initial_count + 1
+        assert email in participants
         
         # Unregister
-        response = client.post(f"/activities/{activity}/unregister?email={email}")
+        response = await client.post(
+            f"/activities/{activity}/unregister", params={"email": email}
+        )
         assert response.status_code == 200
         
         # Verify removed
-        response = client.get("/activities")
-        assert len(response.json()["Programming Class"]["participants"]) == initial_count
+        assert len(participants) == initial_count
+        assert email not in participants
 
-    def test_multiple_participants_signup(self, client, reset_activities):
+    async def test_multiple_participants_signup(self, client):
         """Test multiple different participants signing up"""
         emails = [
             "participant1@mergington.edu",
@@ -207,14 +287,13 @@ class TestMultipleSignupsAndUnregisters:
             "participant3@mergington.edu",
         ]
         
+        post = client.post
         for email in emails:
-            response = client.post(
-                f"/activities/Drama%20Club/signup?email={email}"
-            )
+            response = await post("/activities/Drama Club/signup", params={"email": email})
             assert response.status_code == 200
         
         # Verify all were added
-        response = client.get("/activities")
-        participants = response.json()["Drama Club"]["participants"]
+        response = await client.get("/activities")
+        participants = json_body(response)["Drama Club"]["participants"]
         for email in emails:
             assert email in participants